@@ -14,22 +14,25 @@ Funcionalidades Principais:
 - Ordenação Inteligente: Ordena as atividades por responsável e depois por pasta.
 - Destaque Visual Preciso: Usa cores de fundo e texto informativo para
   diferenciar alertas de duplicidade e consistência.
-- Contexto Histórico: Para cada atividade aberta, exibe todas as outras
-  atividades da mesma pasta dentro do período de tempo selecionado.
+- Contexto Histórico: Para a atividade selecionada na tabela, exibe todas as
+  outras atividades da mesma pasta dentro do período de tempo selecionado.
 - Filtros Inteligentes: Os filtros de responsável, pasta e texto se aplicam
   apenas às atividades ativas.
 """
 
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine, text, exc
+import numpy as np
 from sqlalchemy.engine import Engine
 from datetime import datetime, timedelta
-from typing import Optional
 import streamlit.components.v1 as components
 
+from data_access import db_engine_mysql, carregar_opcoes_filtros, carregar_paginas, PASTAS_POR_PAGINA
+
 # --- Chave de Sessão para Login ---
 USERNAME_KEY = "username_distro_app"
+# --- Chave de Sessão para a Paginação por Pasta ---
+PAGINACAO_KEY = "paginacao_distro_app"
 
 # --- Configuração Geral da Página ---
 st.set_page_config(
@@ -37,17 +40,9 @@ st.set_page_config(
     page_title="Apoio à Distribuição de 'Verificar'"
 )
 
-# --- CSS Customizado para Cores de Fundo e Layout Compacto ---
-# REVISÃO 11: Simplificação radical. Removemos todo o CSS de coloração,
-# pois a formatação será feita diretamente no Python com Markdown.
+# --- CSS Customizado da Legenda ---
 st.markdown("""
 <style>
-    /* Adiciona um espaço abaixo de cada expander para separá-los. */
-    div[data-testid="stExpander"] {
-        margin-bottom: 8px !important;
-    }
-
-    /* --- Estilos da Legenda (sem alterações) --- */
     .legenda { display: flex; align-items: center; margin-bottom: 1rem; }
     .cor-box { width: 20px; height: 20px; margin-right: 10px; border: 1px solid #ccc; }
     .vermelho { background-color: #ffcdd2; }
@@ -56,70 +51,163 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- Legenda dos Alertas ---
+# Conteúdo fixo, emitido em main() fora do fragmento da lista, para não ser
+# reenviado a cada alteração de filtro.
+LEGENDA_HTML = """
+    <div class="legenda">
+        <div class="cor-box vermelho"></div><span><b>Alerta Crítico (Vermelho):</b> A mesma pessoa tem mais de uma atividade ativa na mesma pasta.</span>
+    </div>
+    <div class="legenda">
+        <div class="cor-box preto"></div><span><b>Alerta de Consistência (Preto):</b> Pessoas diferentes têm atividades ativas na mesma pasta.</span>
+    </div>
+    <div class="legenda">
+        <div class="cor-box cinza"></div><span><b>Normal (Cinza):</b> Apenas uma atividade ativa nesta pasta.</span>
+    </div>
+    """
+
+# Cores de fundo das linhas da tabela, as mesmas da legenda.
+CORES_ALERTA = {'alert-red': '#ffcdd2', 'alert-black': '#BDBDBD', 'alert-gray': '#f5f5f5'}
+ROTULOS_ALERTA = {'alert-red': '❗️ Crítico', 'alert-black': '⚠️ Consistência', 'alert-gray': ''}
+
+def _estilo_alertas(tabela: pd.DataFrame, classes: pd.Series) -> pd.DataFrame:
+    """Estilo do Styler que pinta cada linha com a cor do seu alerta."""
+    estilos = ("background-color: " + classes.map(CORES_ALERTA)).to_numpy()
+    return pd.DataFrame({coluna: estilos for coluna in tabela.columns}, index=tabela.index)
 
 st.title("Apoio à Distribuição de Atividades 'Verificar'")
 
-# --- Conexão com o Banco de Dados ---
-@st.cache_resource
-def db_engine_mysql() -> Optional[Engine]:
-    """
-    Cria e gerencia a conexão com o banco de dados MySQL usando SQLAlchemy.
-    """
-    try:
-        cfg = st.secrets.get("database", {})
-        db_user, db_password, db_host, db_name = cfg.get("user"), cfg.get("password"), cfg.get("host"), cfg.get("name")
-        if not all([db_user, db_password, db_host, db_name]):
-            st.error("As credenciais do banco de dados (MySQL) não foram configuradas nos segredos.")
-            return None
-        connection_url = f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}/{db_name}"
-        engine = create_engine(connection_url, pool_pre_ping=True, pool_recycle=3600)
-        with engine.connect(): pass
-        return engine
-    except exc.SQLAlchemyError as e:
-        st.error(f"Ocorreu um erro ao conectar ao banco de dados (MySQL): {e}")
-        return None
-
-# --- Carregamento de Dados ---
-@st.cache_data(ttl=300) # Cache de 5 minutos
-def carregar_dados_contextuais(_eng: Engine, data_inicio: datetime.date, data_fim: datetime.date) -> pd.DataFrame:
+# --- Filtros e Lista de Atividades ---
+def _carregar_mais_paginas():
+    """Callback do botão 'Carregar mais pastas': solicita a próxima página."""
+    st.session_state[PAGINACAO_KEY]["paginas"] += 1
+
+@st.fragment
+def exibir_atividades(engine: Engine, data_inicio: datetime.date, data_fim: datetime.date):
     """
-    Carrega dados de forma contextual, incluindo status 'Aguardando'.
+    Exibe os filtros das atividades ativas e a lista resultante.
+
+    Como fragmento, alterar um filtro reexecuta apenas esta função, sem
+    refazer o login e a barra lateral. Fragmentos não podem escrever na barra
+    lateral, por isso estes filtros ficam no corpo da página.
     """
-    if _eng is None: return pd.DataFrame()
-    start_datetime = datetime.combine(data_inicio, datetime.min.time())
-    end_datetime = datetime.combine(data_fim, datetime.max.time())
+    st.subheader("🔎 Filtrar Atividades Ativas")
+
+    lista_pastas, lista_responsaveis = carregar_opcoes_filtros(engine)
+    col_pastas, col_responsaveis, col_texto = st.columns(3)
+
+    pastas_selecionadas = col_pastas.multiselect("📁 Pastas", options=lista_pastas)
+    usuarios_selecionados = col_responsaveis.multiselect("👤 Responsáveis", options=lista_responsaveis)
+    
+    texto_busca = col_texto.text_input("📝 Buscar no Texto")
     
-    active_statuses = ('Aberta', 'Aguardando')
+    # A quantidade de páginas carregadas volta a 1 sempre que o período ou os
+    # filtros mudam.
+    consulta = (data_inicio, data_fim, tuple(pastas_selecionadas), tuple(usuarios_selecionados), texto_busca)
+    paginacao = st.session_state.get(PAGINACAO_KEY)
+    if paginacao is None or paginacao["consulta"] != consulta:
+        paginacao = st.session_state[PAGINACAO_KEY] = {"consulta": consulta, "paginas": 1}
+
+    with st.spinner("Carregando dados das atividades... Por favor, aguarde."):
+        df_contexto_total, tem_mais_paginas = carregar_paginas(engine, *consulta, paginacao["paginas"])
+
+    if df_contexto_total.empty:
+        st.info("Nenhuma atividade 'Aberta' ou 'Aguardando' foi encontrada, ou não há histórico para elas no período selecionado.")
+        if tem_mais_paginas:
+            st.button("⬇️ Carregar mais pastas", on_click=_carregar_mais_paginas)
+        return
+
+    active_statuses = ['Aberta', 'Aguardando']
+    df_ativas = df_contexto_total[df_contexto_total['activity_status'].isin(active_statuses)]
+
+    # Classificação dos alertas por agrupamento, sem varrer df_ativas para cada
+    # atividade: quantas atividades ativas distintas há na pasta e quantas delas
+    # são do mesmo responsável. nunique, e não size, para que um mesmo
+    # activity_id repetido pela view não conte como conflito.
+    qtd_ativas_pasta = df_ativas.groupby('activity_folder', observed=True, sort=False)['activity_id'].transform('nunique')
+    qtd_ativas_resp = df_ativas.groupby(['activity_folder', 'user_profile_name'], observed=True, sort=False)['activity_id'].transform('nunique')
+    # Pasta ou responsável nulos ficam fora dos grupos (contagem <NA>) e nunca
+    # contam como conflito; um responsável nulo não é "a mesma pessoa".
+    df_ativas = df_ativas.assign(classe_css=np.select(
+        [(qtd_ativas_resp > 1).to_numpy(dtype=bool, na_value=False),
+         (qtd_ativas_pasta > 1).to_numpy(dtype=bool, na_value=False)],
+        ['alert-red', 'alert-black'], default='alert-gray'
+    ))
+
+    # As atividades ativas que atendem aos filtros já vêm marcadas pelo banco
+    # (atende_filtros); as demais ficam apenas como contexto dos alertas.
+    df_ativas_filtrado = df_ativas[df_ativas['atende_filtros']]
 
-    query = text(f"""
-        WITH PastasAtivas AS (
-            SELECT DISTINCT activity_folder
-            FROM ViewGrdAtividadesTarcisio
-            WHERE activity_type = 'Verificar' AND activity_status IN {active_statuses}
+    if not df_ativas_filtrado.empty:
+        df_ativas_filtrado = df_ativas_filtrado.sort_values(
+            by=['user_profile_name', 'activity_folder', 'activity_date'], 
+            ascending=[True, True, False]
         )
-        SELECT 
-            v.activity_id, v.activity_folder, v.user_profile_name, 
-            v.activity_date, v.activity_status, v.Texto
-        FROM ViewGrdAtividadesTarcisio v
-        JOIN PastasAtivas p ON v.activity_folder = p.activity_folder
-        WHERE 
-            v.activity_type = 'Verificar' 
-            AND (
-                v.activity_status IN {active_statuses} OR
-                v.activity_date BETWEEN :start_datetime AND :end_datetime
-            )
-    """)
-    try:
-        with _eng.connect() as conn:
-            df = pd.read_sql(query, conn, params={"start_datetime": start_datetime, "end_datetime": end_datetime})
-        if not df.empty:
-            df["activity_id"] = df["activity_id"].astype(str)
-            df["activity_date"] = pd.to_datetime(df["activity_date"], errors='coerce')
-            df["Texto"] = df["Texto"].fillna("").astype(str)
-        return df.sort_values("activity_date", ascending=False)
-    except exc.SQLAlchemyError as e:
-        st.error(f"Erro ao executar a consulta no banco de dados: {e}")
-        return pd.DataFrame()
+
+    st.metric("Total de Atividades Ativas (após filtros)", len(df_ativas_filtrado))
+    if tem_mais_paginas:
+        st.caption(f"Exibindo as primeiras {paginacao['paginas'] * PASTAS_POR_PAGINA} pastas; use \"Carregar mais pastas\" abaixo da tabela para ver as demais.")
+    
+    st.caption(f"Exibindo atividades ativas ('Aberta' ou 'Aguardando') e seu histórico de contexto.")
+    st.markdown("---")
+
+    # Descrição do conflito, calculada só para as atividades com alerta.
+    ativas_por_pasta = dict(list(df_ativas.groupby('activity_folder', observed=True, sort=False)))
+    descricoes_conflito = []
+    for atividade_atual in df_ativas_filtrado.itertuples(index=False):
+        info_conflito = ""
+        if atividade_atual.classe_css != 'alert-gray':
+            ativas_pasta = ativas_por_pasta[atividade_atual.activity_folder]
+            conflitos_df = ativas_pasta[ativas_pasta['activity_id'] != atividade_atual.activity_id]
+            if atividade_atual.classe_css == 'alert-red':
+                outro = conflitos_df[conflitos_df['user_profile_name'] == atividade_atual.user_profile_name].iloc[0]
+                info_conflito = f"ID {outro['activity_id']} | Status: {outro['activity_status']}"
+            else:
+                outro = conflitos_df.iloc[0]
+                info_conflito = f"ID {outro['activity_id']} | Resp: {outro['user_profile_name']}"
+        descricoes_conflito.append(info_conflito)
+
+    # Uma única tabela para todas as atividades ativas, colorida conforme a
+    # legenda; o conteúdo e o histórico aparecem para a linha selecionada.
+    df_tabela = df_ativas_filtrado[
+        ['activity_id', 'activity_folder', 'user_profile_name', 'activity_status', 'activity_date']
+    ].assign(
+        alerta=df_ativas_filtrado['classe_css'].map(ROTULOS_ALERTA).to_numpy(),
+        conflito=descricoes_conflito,
+    )
+    evento = st.dataframe(
+        df_tabela.style.apply(_estilo_alertas, axis=None, classes=df_ativas_filtrado['classe_css']),
+        use_container_width=True, hide_index=True,
+        # A seleção é posicional: a chave muda com as atividades exibidas (e sua
+        # ordem), descartando a seleção sempre que os dados mudam, inclusive
+        # quando o cache expira ou é limpo com a mesma consulta.
+        key=f"tabela_ativas_{hash(tuple(df_ativas_filtrado['activity_id']))}",
+        on_select="rerun", selection_mode="single-row",
+        column_config={
+            "activity_id": "ID", "activity_folder": "Pasta", "user_profile_name": "Responsável",
+            "activity_status": "Status",
+            "activity_date": st.column_config.DatetimeColumn("Data", format="DD/MM/YYYY HH:mm"),
+            "alerta": "Alerta", "conflito": "Conflito com"
+        })
+
+    if tem_mais_paginas:
+        st.button("⬇️ Carregar mais pastas", on_click=_carregar_mais_paginas)
+
+    linhas_selecionadas = [i for i in evento.selection.rows if i < len(df_ativas_filtrado)]
+    if not linhas_selecionadas:
+        st.caption("Selecione uma atividade na tabela para ver o conteúdo e o histórico da pasta.")
+        return
+
+    atividade_atual = df_ativas_filtrado.iloc[linhas_selecionadas[0]]
+    st.text_area("Conteúdo", atividade_atual['Texto'], key=f"texto_{atividade_atual['activity_id']}", height=150, disabled=True)
+    st.subheader(f"Histórico da Pasta '{atividade_atual['activity_folder']}' no Período")
+    df_historico_pasta = df_contexto_total[df_contexto_total['activity_folder'] == atividade_atual['activity_folder']]
+    st.dataframe(df_historico_pasta, use_container_width=True, hide_index=True,
+        column_config={
+            "activity_id": "ID", "activity_folder": None, "user_profile_name": "Responsável",
+            "activity_date": st.column_config.DatetimeColumn("Data", format="DD/MM/YYYY HH:mm"),
+            "activity_status": "Status", "Texto": None, "atende_filtros": None
+        })
 
 # --- Interface Principal ---
 def main():
@@ -164,102 +252,9 @@ def main():
 
     engine = db_engine_mysql()
     if engine is None: st.stop()
-    
-    with st.spinner("Carregando dados das atividades... Por favor, aguarde."):
-        df_contexto_total = carregar_dados_contextuais(engine, data_inicio, data_fim)
-
-    if df_contexto_total.empty:
-        st.info("Nenhuma atividade 'Aberta' ou 'Aguardando' foi encontrada, ou não há histórico para elas no período selecionado.")
-        st.stop()
-
-    active_statuses = ['Aberta', 'Aguardando']
-    df_ativas = df_contexto_total[df_contexto_total['activity_status'].isin(active_statuses)].copy()
-    
-    st.sidebar.markdown("---")
-    st.sidebar.header("🔎 Filtrar Atividades Ativas")
-
-    lista_pastas = sorted(df_ativas['activity_folder'].dropna().unique().tolist())
-    pastas_selecionadas = st.sidebar.multiselect("📁 Pastas", options=lista_pastas)
-
-    lista_responsaveis = sorted(df_ativas['user_profile_name'].dropna().unique().tolist())
-    usuarios_selecionados = st.sidebar.multiselect("👤 Responsáveis", options=lista_responsaveis)
-    
-    texto_busca = st.sidebar.text_input("📝 Buscar no Texto")
-
-    df_ativas_filtrado = df_ativas
-    if pastas_selecionadas:
-        df_ativas_filtrado = df_ativas_filtrado[df_ativas_filtrado['activity_folder'].isin(pastas_selecionadas)]
-    if usuarios_selecionados:
-        df_ativas_filtrado = df_ativas_filtrado[df_ativas_filtrado['user_profile_name'].isin(usuarios_selecionados)]
-    if texto_busca:
-        df_ativas_filtrado = df_ativas_filtrado[df_ativas_filtrado['Texto'].str.contains(texto_busca, case=False, na=False)]
-
-    if not df_ativas_filtrado.empty:
-        df_ativas_filtrado = df_ativas_filtrado.sort_values(
-            by=['user_profile_name', 'activity_folder', 'activity_date'], 
-            ascending=[True, True, False]
-        )
-
-    st.metric("Total de Atividades Ativas (após filtros)", len(df_ativas_filtrado))
-    
-    st.markdown("""
-        <div class="legenda">
-            <div class="cor-box vermelho"></div><span><b>Alerta Crítico (Vermelho):</b> A mesma pessoa tem mais de uma atividade ativa na mesma pasta.</span>
-        </div>
-        <div class="legenda">
-            <div class="cor-box preto"></div><span><b>Alerta de Consistência (Preto):</b> Pessoas diferentes têm atividades ativas na mesma pasta.</span>
-        </div>
-        <div class="legenda">
-            <div class="cor-box cinza"></div><span><b>Normal (Cinza):</b> Apenas uma atividade ativa nesta pasta.</span>
-        </div>
-        """, unsafe_allow_html=True)
-
-    st.caption(f"Exibindo atividades ativas ('Aberta' ou 'Aguardando') e seu histórico de contexto.")
-    st.markdown("---")
-
-    for _, atividade_atual in df_ativas_filtrado.iterrows():
-        conflitos_df = df_ativas[
-            (df_ativas['activity_folder'] == atividade_atual['activity_folder']) &
-            (df_ativas['activity_id'] != atividade_atual['activity_id'])
-        ]
-
-        classe_css = 'alert-gray'
-        info_conflito = ""
-        
-        if not conflitos_df.empty:
-            conflito_mesmo_resp = conflitos_df[conflitos_df['user_profile_name'] == atividade_atual['user_profile_name']]
-            if not conflito_mesmo_resp.empty:
-                classe_css = 'alert-red'
-                outro = conflito_mesmo_resp.iloc[0]
-                info_conflito = f" (Conflito com ID {outro['activity_id']} | Status: {outro['activity_status']})"
-            else:
-                classe_css = 'alert-black'
-                outro = conflitos_df.iloc[0]
-                info_conflito = f" (Conflito com ID {outro['activity_id']} | Resp: {outro['user_profile_name']})"
-
-        # REVISÃO 11: A formatação do título é feita aqui, com Markdown.
-        base_title = (
-            f"ID: {atividade_atual['activity_id']} | Pasta: {atividade_atual['activity_folder']} | "
-            f"Responsável: {atividade_atual['user_profile_name']} | Status: {atividade_atual['activity_status']}{info_conflito}"
-        )
 
-        if classe_css == 'alert-red':
-            expander_title = f"❗️ :red[**{base_title}**] ❗️"
-        elif classe_css == 'alert-black':
-            expander_title = f"⚠️ **{base_title}** ⚠️" # Usamos negrito para destaque, cor preta é o padrão.
-        else: # alert-gray
-            expander_title = base_title
-        
-        with st.expander(expander_title, expanded=False):
-            st.text_area("Conteúdo", atividade_atual['Texto'], key=f"texto_{atividade_atual['activity_id']}", height=150, disabled=True)
-            st.subheader(f"Histórico da Pasta '{atividade_atual['activity_folder']}' no Período")
-            df_historico_pasta = df_contexto_total[df_contexto_total['activity_folder'] == atividade_atual['activity_folder']]
-            st.dataframe(df_historico_pasta, use_container_width=True, hide_index=True,
-                column_config={
-                    "activity_id": "ID", "activity_folder": None, "user_profile_name": "Responsável",
-                    "activity_date": st.column_config.DatetimeColumn("Data", format="DD/MM/YYYY HH:mm"),
-                    "activity_status": "Status", "Texto": None
-                })
+    st.markdown(LEGENDA_HTML, unsafe_allow_html=True)
+    exibir_atividades(engine, data_inicio, data_fim)
 
 if __name__ == "__main__":
     main()
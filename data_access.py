@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo de Acesso a Dados das Atividades 'Verificar'
+===================================================
+
+Este módulo concentra a conexão com o banco MySQL e as consultas usadas pelas
+páginas do aplicativo. Como o Streamlit identifica os caches de
+@st.cache_resource e @st.cache_data pela função decorada, manter a conexão e
+os carregadores em um único módulo faz com que todas as páginas que os
+importam compartilhem o mesmo pool de conexões e os mesmos DataFrames em cache.
+
+- db_engine_mysql: Engine SQLAlchemy compartilhada.
+- carregar_opcoes_filtros: Opções dos filtros de pasta e responsável.
+- carregar_dados_contextuais: Atividades ativas e o histórico de suas pastas,
+  com os filtros aplicados no banco, uma página de pastas por vez.
+- carregar_paginas: Junta as páginas já solicitadas pela interface.
+"""
+import streamlit as st
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy import create_engine, text, exc, bindparam
+from sqlalchemy.engine import Engine
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+# --- Conexão com o Banco de Dados ---
+@st.cache_resource
+def db_engine_mysql() -> Optional[Engine]:
+    """
+    Cria e gerencia a conexão com o banco de dados MySQL usando SQLAlchemy.
+    """
+    try:
+        cfg = st.secrets.get("database", {})
+        db_user, db_password, db_host, db_name = cfg.get("user"), cfg.get("password"), cfg.get("host"), cfg.get("name")
+        if not all([db_user, db_password, db_host, db_name]):
+            st.error("As credenciais do banco de dados (MySQL) não foram configuradas nos segredos.")
+            return None
+        # PyMySQL, ao contrário do mysql-connector, permite cursor no servidor
+        # (stream_results) no SQLAlchemy, usado na leitura em blocos.
+        connection_url = f"mysql+pymysql://{db_user}:{db_password}@{db_host}/{db_name}"
+        engine = create_engine(connection_url, pool_pre_ping=True, pool_recycle=3600)
+        with engine.connect(): pass
+        return engine
+    except exc.SQLAlchemyError as e:
+        st.error(f"Ocorreu um erro ao conectar ao banco de dados (MySQL): {e}")
+        return None
+
+# --- Colunas de baixa cardinalidade, armazenadas como 'category' ---
+COLUNAS_CATEGORICAS = ["user_profile_name", "activity_status", "activity_folder"]
+
+# --- Busca Textual ---
+# Tamanho mínimo de palavra indexada (innodb_ft_min_token_size). O FULLTEXT só
+# é usado quando todas as palavras são alfanuméricas e têm esse tamanho; as
+# demais buscas (pontuação, operadores, números como "123/2023", palavras
+# curtas) usam LIKE, que trata a entrada literalmente.
+TAMANHO_MINIMO_FULLTEXT = 3
+
+def _palavras_busca(texto: str) -> tuple:
+    """Palavras distintas da busca, na ordem em que foram digitadas."""
+    return tuple(dict.fromkeys(texto.split()))
+
+def _usa_fulltext(texto: str) -> bool:
+    """Indica se a busca pode usar o índice FULLTEXT (ft_texto)."""
+    palavras = _palavras_busca(texto)
+    return bool(palavras) and all(p.isalnum() and len(p) >= TAMANHO_MINIMO_FULLTEXT for p in palavras)
+
+def _predicado_texto(alias: str, texto: str) -> str:
+    """
+    Monta a condição SQL de busca no campo Texto da tabela `alias`: todas as
+    palavras devem aparecer, em qualquer ordem.
+    """
+    if _usa_fulltext(texto):
+        return f"MATCH({alias}.Texto) AGAINST (:texto IN BOOLEAN MODE) > 0"
+    return " AND ".join(f"{alias}.Texto LIKE :texto_{i}" for i in range(len(_palavras_busca(texto))))
+
+def _parametros_texto(texto: str) -> dict:
+    """Valores dos parâmetros usados por _predicado_texto."""
+    palavras = _palavras_busca(texto)
+    if _usa_fulltext(texto):
+        # '+' torna cada palavra obrigatória e '*' aceita palavras que começam
+        # com ela ("proc" encontra "processo"). Trechos no meio de uma palavra
+        # só são encontrados pelo LIKE.
+        return {"texto": " ".join(f"+{p}*" for p in palavras)}
+    return {
+        f"texto_{i}": "%" + p.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        for i, p in enumerate(palavras)
+    }
+
+# --- Paginação ---
+# Quantidade de pastas (com todo o seu contexto) trazidas por página.
+PASTAS_POR_PAGINA = 200
+# Quantidade de linhas lidas do banco por bloco.
+LINHAS_POR_BLOCO = 50_000
+
+# --- Carregamento de Dados ---
+@st.cache_data(ttl=300) # Cache de 5 minutos
+def carregar_opcoes_filtros(_eng: Engine) -> Tuple[list, list]:
+    """
+    Carrega as pastas e os responsáveis das atividades ativas, já ordenados,
+    usados como opções dos filtros. As listas ficam no cache, evitando refazer
+    unique() e sorted() a cada interação.
+    """
+    if _eng is None: return [], []
+    active_statuses = ('Aberta', 'Aguardando')
+    query = text(f"""
+        SELECT DISTINCT v.activity_folder, v.user_profile_name
+        FROM ViewGrdAtividadesTarcisio v
+        WHERE v.activity_type = 'Verificar' AND v.activity_status IN {active_statuses}
+    """)
+    try:
+        with _eng.connect() as conn:
+            df = pd.read_sql(query, conn)
+    except exc.SQLAlchemyError as e:
+        st.error(f"Erro ao carregar as opções de filtro: {e}")
+        return [], []
+    return (
+        sorted(df['activity_folder'].dropna().unique().tolist()),
+        sorted(df['user_profile_name'].dropna().unique().tolist()),
+    )
+
+# Cache de 5 minutos, limitado às 32 combinações de período e filtros mais
+# recentes. Sem persist="disk": o Streamlit ignora o ttl em caches persistidos,
+# e os dados ficariam desatualizados até um "Recarregar Dados".
+@st.cache_data(ttl=300, max_entries=32)
+def carregar_dados_contextuais(_eng: Engine, data_inicio: datetime.date, data_fim: datetime.date,
+                               pastas: tuple = (), usuarios: tuple = (), texto: str = "",
+                               cursor_pasta: Optional[str] = None) -> Tuple[pd.DataFrame, Optional[str], bool]:
+    """
+    Carrega dados de forma contextual, incluindo status 'Aguardando'.
+
+    Os filtros de pasta, responsável e texto são aplicados no banco: apenas as
+    pastas que têm alguma atividade ativa atendendo aos filtros são retornadas,
+    com todo o seu contexto (demais atividades ativas e histórico do período),
+    que continua necessário para os alertas de conflito.
+
+    O resultado é paginado por pasta: são consideradas no máximo
+    PASTAS_POR_PAGINA pastas, em ordem, posteriores a `cursor_pasta`.
+
+    Returns:
+        tuple: O DataFrame da página, a última pasta da página (cursor da
+        próxima) e se há uma próxima página.
+    """
+    if _eng is None: return pd.DataFrame(), None, False
+    texto = texto.strip()
+    # Intervalo semiaberto [início, fim + 1 dia) para que o filtro por data
+    # continue sargável e use o índice (activity_type, activity_date).
+    start_datetime = datetime.combine(data_inicio, datetime.min.time())
+    end_datetime_exclusive = datetime.combine(data_fim + timedelta(days=1), datetime.min.time())
+    
+    active_statuses = ('Aberta', 'Aguardando')
+
+    params = {"start_datetime": start_datetime, "end_datetime_exclusive": end_datetime_exclusive}
+    bind_params_usuarios = []
+    bind_params_pastas = []
+    condicoes_pasta = []
+    if cursor_pasta is not None:
+        condicoes_pasta.append("m.activity_folder > :cursor_pasta")
+        params["cursor_pasta"] = cursor_pasta
+    if pastas:
+        condicoes_pasta.append("m.activity_folder IN :pastas")
+        params["pastas"] = list(pastas)
+        bind_params_pastas.append(bindparam("pastas", expanding=True))
+    if usuarios:
+        params["usuarios"] = list(usuarios)
+        bind_params_usuarios.append(bindparam("usuarios", expanding=True))
+    if texto:
+        params.update(_parametros_texto(texto))
+
+    def condicoes_ativas(alias: str) -> str:
+        """Condição SQL de uma atividade ativa que atende aos filtros de responsável e texto."""
+        condicoes = [f"{alias}.activity_type = 'Verificar'", f"{alias}.activity_status IN {active_statuses}"]
+        if usuarios:
+            condicoes.append(f"{alias}.user_profile_name IN :usuarios")
+        if texto:
+            condicoes.append(_predicado_texto(alias, texto))
+        return " AND ".join(condicoes)
+
+    # Responsável e texto restringem as pastas pelas atividades ativas que os
+    # atendem, sem descartar o restante do contexto dessas pastas.
+    if usuarios or texto:
+        condicoes_pasta.append(f"""m.activity_folder IN (
+                SELECT f.activity_folder
+                FROM ViewGrdAtividadesTarcisio f
+                WHERE {condicoes_ativas("f")}
+            )""")
+    where_pasta = f"WHERE {' AND '.join(condicoes_pasta)}" if condicoes_pasta else ""
+
+    # mv_pastas_com_abertas é pré-calculada no banco (ver sql/mv_pastas_com_abertas.sql),
+    # evitando o DISTINCT sobre a view inteira a cada consulta. A página de
+    # pastas é obtida por keyset (activity_folder > cursor) sobre a chave
+    # primária, sem o custo crescente de um OFFSET. Uma pasta a mais indica se
+    # há próxima página; o cursor e esse indicador vêm desta consulta, na
+    # ordem do próprio banco, e não das linhas retornadas depois (uma pasta
+    # sem linhas no período não encerra a paginação).
+    query_pastas = text(f"""
+        SELECT m.activity_folder
+        FROM mv_pastas_com_abertas m
+        {where_pasta}
+        ORDER BY m.activity_folder
+        LIMIT {PASTAS_POR_PAGINA + 1}
+    """).bindparams(*bind_params_pastas, *bind_params_usuarios)
+
+    query = text(f"""
+        SELECT 
+            CAST(v.activity_id AS CHAR) AS activity_id, v.activity_folder, v.user_profile_name, 
+            v.activity_date, v.activity_status, COALESCE(v.Texto, '') AS Texto,
+            ({condicoes_ativas("v")}) AS atende_filtros
+        FROM ViewGrdAtividadesTarcisio v
+        WHERE 
+            v.activity_type = 'Verificar' 
+            AND v.activity_folder IN :pastas_pagina
+            AND (
+                v.activity_status IN {active_statuses} OR
+                (v.activity_date >= :start_datetime AND v.activity_date < :end_datetime_exclusive)
+            )
+        ORDER BY v.activity_date DESC
+    """).bindparams(bindparam("pastas_pagina", expanding=True), *bind_params_usuarios)
+    try:
+        with _eng.connect() as conn:
+            pastas_pagina = conn.execute(query_pastas, params).scalars().all()
+            if not pastas_pagina:
+                return pd.DataFrame(), None, False
+            tem_mais = len(pastas_pagina) > PASTAS_POR_PAGINA
+            pastas_pagina = pastas_pagina[:PASTAS_POR_PAGINA]
+            params["pastas_pagina"] = list(pastas_pagina)
+
+            # Leitura em blocos com cursor no servidor (stream_results, SSCursor
+            # do PyMySQL): o driver não acumula o resultado inteiro; cada bloco
+            # de LINHAS_POR_BLOCO linhas vira uma tabela Arrow e só o resultado
+            # final é convertido em DataFrame. activity_id e Texto já chegam
+            # como texto (CAST/COALESCE na consulta) e viram string[pyarrow].
+            conn.execution_options(stream_results=True)
+            blocos = pd.read_sql(query, conn, params=params, chunksize=LINHAS_POR_BLOCO, dtype_backend="pyarrow")
+            tabelas = [pa.Table.from_pandas(bloco, preserve_index=False) for bloco in blocos]
+        if not tabelas:
+            return pd.DataFrame(), pastas_pagina[-1], tem_mais
+        # promote_options: um bloco só com nulos em uma coluna tem tipo 'null'.
+        df = pa.concat_tables(tabelas, promote_options="default").to_pandas(types_mapper=pd.ArrowDtype)
+        if not df.empty:
+            # O driver já entrega datetime, convertido para timestamp Arrow na leitura.
+            assert df["activity_date"].dtype.kind == "M", df["activity_date"].dtype
+            # Colunas de baixa cardinalidade: filtros e agrupamentos passam a
+            # operar sobre códigos inteiros em vez de strings.
+            for coluna in COLUNAS_CATEGORICAS:
+                df[coluna] = df[coluna].astype("category")
+            df["atende_filtros"] = df["atende_filtros"].fillna(0).astype(bool)
+        return df, pastas_pagina[-1], tem_mais
+    except exc.SQLAlchemyError as e:
+        st.error(f"Erro ao executar a consulta no banco de dados: {e}")
+        return pd.DataFrame(), None, False
+
+def carregar_paginas(_eng: Engine, data_inicio: datetime.date, data_fim: datetime.date,
+                     pastas: tuple, usuarios: tuple, texto: str, qtd_paginas: int) -> Tuple[pd.DataFrame, bool]:
+    """
+    Carrega as `qtd_paginas` primeiras páginas de carregar_dados_contextuais,
+    cada uma em seu próprio cache, e as concatena.
+
+    Returns:
+        tuple: O DataFrame com as páginas carregadas e se há mais páginas.
+    """
+    paginas = []
+    cursor_pasta = None
+    tem_mais = True
+    for _ in range(qtd_paginas):
+        pagina, cursor_pasta, tem_mais = carregar_dados_contextuais(
+            _eng, data_inicio, data_fim, pastas, usuarios, texto, cursor_pasta
+        )
+        # Uma página pode vir vazia (pastas sem linhas no período) e ainda
+        # haver páginas seguintes.
+        if not pagina.empty:
+            paginas.append(pagina)
+        if not tem_mais:
+            break
+
+    if not paginas:
+        return pd.DataFrame(), tem_mais
+    if len(paginas) == 1:
+        return paginas[0], tem_mais
+    df = pd.concat(paginas, ignore_index=True)
+    # Páginas com categorias diferentes são concatenadas como texto.
+    for coluna in COLUNAS_CATEGORICAS:
+        df[coluna] = df[coluna].astype("category")
+    return df, tem_mais
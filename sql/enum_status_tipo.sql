@@ -0,0 +1,27 @@
+-- -*- coding: utf-8 -*-
+-- Colunas ENUM para activity_status e activity_type
+-- ================================================
+--
+-- activity_status e activity_type têm poucos valores distintos repetidos em
+-- todas as linhas. Como ENUM, cada valor ocupa 1 byte na tabela e nos índices
+-- (idx_tipo_data, ver indices_atividades.sql) e as comparações passam a ser
+-- feitas sobre o código. A view e as consultas do app não mudam: ENUM é
+-- comparado e devolvido como texto. Por isso o tamanho do resultado enviado
+-- ao app continua o mesmo; no app essas colunas já viram 'category'.
+--
+-- Substitua `tabela_base_atividades` pelo nome real da tabela base de
+-- ViewGrdAtividadesTarcisio antes de executar.
+
+-- Garante o modo estrito nesta sessão: sem ele o MySQL converteria em ''
+-- todo valor ausente da lista do ENUM (ex.: 'Fechada'), apagando o histórico.
+-- Com ele, o ALTER falha até que as listas estejam completas.
+SET SESSION sql_mode = CONCAT_WS(',', NULLIF(@@SESSION.sql_mode, ''), 'STRICT_ALL_TABLES');
+
+-- 1. Liste os valores existentes. Todos precisam constar no ENUM.
+SELECT DISTINCT activity_status FROM tabela_base_atividades;
+SELECT DISTINCT activity_type FROM tabela_base_atividades;
+
+-- 2. Complete as listas abaixo com os valores retornados acima.
+ALTER TABLE tabela_base_atividades
+    MODIFY activity_status ENUM('Aberta', 'Aguardando' /* , demais status */),
+    MODIFY activity_type ENUM('Verificar' /* , demais tipos */);
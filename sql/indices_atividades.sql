@@ -0,0 +1,24 @@
+-- -*- coding: utf-8 -*-
+-- Índices de apoio às consultas de data_access.py
+-- =================================================
+--
+-- ViewGrdAtividadesTarcisio é uma view; os índices precisam ser criados na
+-- tabela base que a alimenta. Substitua `tabela_base_atividades` pelo nome
+-- real dessa tabela antes de executar.
+--
+-- Verificação: rode EXPLAIN na consulta de carregar_dados_contextuais e
+-- confirme `type=range` e `key=idx_tipo_data` no acesso por data.
+
+-- Filtro por tipo + intervalo semiaberto de datas (index range scan).
+ALTER TABLE tabela_base_atividades
+    ADD INDEX idx_tipo_data (activity_type, activity_date);
+
+-- Junção com mv_pastas_com_abertas: busca por pasta via índice (nested loop)
+-- já ordenada por data dentro de cada pasta.
+ALTER TABLE tabela_base_atividades
+    ADD INDEX idx_pasta_data (activity_folder, activity_date);
+
+-- Busca textual do filtro "Buscar no Texto" via MATCH ... AGAINST em modo
+-- booleano (índice invertido em vez de varredura linha a linha).
+ALTER TABLE tabela_base_atividades
+    ADD FULLTEXT INDEX ft_texto (Texto);
@@ -0,0 +1,51 @@
+-- -*- coding: utf-8 -*-
+-- Tabela de Pré-agregação: Pastas com Atividades Ativas
+-- =====================================================
+--
+-- O MySQL não possui views materializadas. Esta tabela faz esse papel: guarda
+-- as pastas que têm ao menos uma atividade 'Verificar' com status 'Aberta' ou
+-- 'Aguardando' e é recalculada periodicamente por um EVENT, evitando que a
+-- aplicação refaça o DISTINCT sobre ViewGrdAtividadesTarcisio a cada consulta.
+--
+-- O intervalo de atualização acompanha o TTL do cache de
+-- carregar_dados_contextuais (5 minutos). Requer `event_scheduler=ON`.
+
+CREATE TABLE IF NOT EXISTS mv_pastas_com_abertas (
+    activity_folder VARCHAR(255) NOT NULL,
+    PRIMARY KEY (activity_folder)
+);
+
+DELIMITER $$
+
+CREATE EVENT IF NOT EXISTS ev_atualiza_mv_pastas_com_abertas
+ON SCHEDULE EVERY 5 MINUTE
+DO
+BEGIN
+    -- Remove as pastas que deixaram de ter atividades ativas...
+    DELETE m FROM mv_pastas_com_abertas m
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM ViewGrdAtividadesTarcisio v
+        WHERE v.activity_folder = m.activity_folder
+          AND v.activity_type = 'Verificar'
+          AND v.activity_status IN ('Aberta', 'Aguardando')
+    );
+
+    -- ...e inclui as que passaram a ter.
+    INSERT IGNORE INTO mv_pastas_com_abertas (activity_folder)
+    SELECT DISTINCT v.activity_folder
+    FROM ViewGrdAtividadesTarcisio v
+    WHERE v.activity_type = 'Verificar'
+      AND v.activity_status IN ('Aberta', 'Aguardando')
+      AND v.activity_folder IS NOT NULL;
+END$$
+
+DELIMITER ;
+
+-- Carga inicial, para não depender da primeira execução do evento.
+INSERT IGNORE INTO mv_pastas_com_abertas (activity_folder)
+SELECT DISTINCT v.activity_folder
+FROM ViewGrdAtividadesTarcisio v
+WHERE v.activity_type = 'Verificar'
+  AND v.activity_status IN ('Aberta', 'Aguardando')
+  AND v.activity_folder IS NOT NULL;